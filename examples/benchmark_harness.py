@@ -0,0 +1,319 @@
+"""
+Shared driver for the benchmark scripts in this directory.
+
+Each script defines the methods it compares and how to call them for one
+setting of the parameters. :func:`run_benchmark` takes care of running the
+grid, collecting the measurements, computing statistics, and plotting.
+"""
+
+
+def compact_repr(data):
+    """
+    Specialized stand-in for ``ub.urepr(data, compact=1, si=1)`` that only
+    handles the flat dictionaries of strings and numbers used as benchmark
+    keys.
+    """
+    if not data:
+        return '{}'
+    return ','.join(f'{k}={v}' for k, v in data.items())
+
+
+def robust_times_array(ti, out=None):
+    """
+    Vectorized version of :func:`timerit.Timerit.robust_times`.
+
+    Args:
+        ti (timerit.Timerit): a Timerit object that has finished timing
+        out (ndarray | None): if specified, the reduced times are written here
+
+    Returns:
+        ndarray: the minimum time of each chunk of ``ti.bestof`` trials
+    """
+    import numpy as np
+    # Reduce the raw counter values and only convert the chunk minimums to
+    # seconds, rather than building the list of converted times
+    raw_times = np.asarray(ti._raw_times, dtype=np.float64)
+    if len(raw_times) % ti.bestof == 0:
+        mins = np.min(raw_times.reshape(-1, ti.bestof), axis=1, out=out)
+    else:
+        # The last chunk is smaller than the others
+        chunk_starts = np.arange(0, len(raw_times), ti.bestof)
+        mins = np.minimum.reduceat(raw_times, chunk_starts, out=out)
+    mins *= ti._to_seconds
+    return mins
+
+
+def run_benchmark(ti, basis, make_call, xlabel, group_labels=None,
+                  xinput_labels=(), plot_labels=None, xscale=None,
+                  yscale=None, record_all=True, use_openskill=False,
+                  plot=True):
+    """
+    Times every combination of parameters in a basis and reports the results.
+
+    Args:
+        ti (timerit.Timerit):
+            The object used to time each setting of the parameters.
+
+        basis (Dict[str, List]):
+            Maps each parameter name to the values to benchmark over. Must
+            contain a "method" parameter.
+
+        make_call (Callable[[Dict], Dict]):
+            Given one setting of the parameters, returns a dictionary with the
+            ``method`` to time and optionally its positional ``args``, its
+            keyword ``kwargs``, a ``setup`` function that returns fresh kwargs
+            before each call, and the number of calls ``num_inner`` to make
+            in each timed block. The setup for every call in a block runs
+            before the block is timed.
+
+        xlabel (str):
+            The parameter plotted on the x axis.
+
+        group_labels (Dict[str, List[str]] | None):
+            The parameters that determine the seaborn "style" and "size" of
+            each line. Unless given, "hue" is all remaining parameters.
+
+        xinput_labels (List[str]):
+            Parameters that are inputs along the x axis and should not be
+            used as a hue.
+
+        plot_labels (Dict[str, str] | None):
+            The "title", "x", and "y" labels of the plot.
+
+        xscale (str | None): x axis scale of the plot (e.g. "log")
+
+        yscale (str | None): y axis scale of the plot (e.g. "log")
+
+        record_all (bool):
+            if True, record every trail run and show variance in seaborn.
+            if False, use the standard timerit min/mean measures.
+
+        use_openskill (bool):
+            if True, rank the methods with OpenSkill.
+
+        plot (bool):
+            if True, plot the results with kwplot and seaborn.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]:
+            The long-form measurements and the per-setting statistics.
+    """
+    import sys
+    import random
+    import itertools as it
+    import ubelt as ub
+    import numpy as np
+    import pandas as pd
+
+    if group_labels is None:
+        group_labels = {}
+    group_labels = dict(group_labels)
+    if 'hue' not in group_labels:
+        group_labels['hue'] = list(
+            (ub.oset(basis) - {xlabel} - set(xinput_labels)) -
+            set.union(set(), *map(set, group_labels.values())))
+    if plot_labels is None:
+        plot_labels = {}
+    # The key labels are built dynamically, so intern them once up front.
+    group_key_labels = {gname: sys.intern(gname + '_key')
+                        for gname in group_labels}
+
+    basis_keys = list(basis)
+    grid_iter = [dict(zip(basis_keys, values))
+                 for values in it.product(*basis.values())]
+
+    # For each variation of your experiment, record its measurements in
+    # preallocated column buffers. Each column is filled by index, which avoids
+    # building one dict per row and lets pandas adopt the arrays directly.
+    if record_all:
+        # robust_times returns one value per chunk of ``bestof`` trials, so
+        # the buffers can only be preallocated for a fixed number of loops
+        assert ti.num is not None, (
+            'record_all needs a fixed number of loops, got ti.num=None')
+        samples_per_params = -(-ti.num // ti.bestof)
+        value_labels = ['time']
+    else:
+        samples_per_params = 1
+        value_labels = ['mean', 'min']
+    total_samples = len(grid_iter) * samples_per_params
+    columns = {label: np.empty(total_samples, dtype=np.float64)
+               for label in value_labels}
+    cursor = 0
+    # Labels that are constant for a params setting are stored once per
+    # setting and are broadcast over its samples when the frame is built.
+    base_rows = []
+    base_labels = ['key', *group_key_labels.values(), *basis]
+    sample_counts = []
+    for params in grid_iter:
+        group_keys = {}
+        for gname, labels in group_labels.items():
+            group_keys[group_key_labels[gname]] = compact_repr(
+                {k: params[k] for k in labels if k in params})
+        key = compact_repr(params)
+
+        call = make_call(params)
+        method = call['method']
+        args = call.get('args', ())
+        kwargs = call.get('kwargs', {})
+        setup = call.get('setup', None)
+        num_inner = call.get('num_inner', 1)
+        inner_iter = range(num_inner)
+        # Without setup the kwargs never change, so an empty dict does not
+        # need to be unpacked in each timed block
+        use_kwargs = bool(kwargs) or setup is not None
+
+        # Timerit will run some user-specified number of loops.
+        # and compute time stats with similar methodology to timeit
+        for timer in ti.reset(key):
+            # Any setup logic we dont want to time goes here.
+            if setup is not None and num_inner > 1:
+                # Each call gets its own fresh kwargs, which are all built
+                # before the block is timed
+                block_kwargs = [{**kwargs, **setup()} for _ in inner_iter]
+                with timer:
+                    for call_kwargs in block_kwargs:
+                        method(*args, **call_kwargs)
+                continue
+            if setup is not None:
+                kwargs.update(setup())
+            # Only loop over the inner calls when there is more than one, so
+            # the plain case times nothing but the call itself
+            if num_inner == 1:
+                if use_kwargs:
+                    with timer:
+                        method(*args, **kwargs)
+                else:
+                    with timer:
+                        method(*args)
+            elif use_kwargs:
+                with timer:
+                    for _ in inner_iter:
+                        method(*args, **kwargs)
+            else:
+                with timer:
+                    for _ in inner_iter:
+                        method(*args)
+
+        if record_all:
+            # Seaborn will show the variance if this is enabled, otherwise
+            # use the robust timerit mean / min times
+            stop = cursor + -(-ti.n_loops // ti.bestof)
+            times = robust_times_array(ti, out=columns['time'][cursor:stop])
+            times /= num_inner
+        else:
+            stop = cursor + 1
+            columns['mean'][cursor] = ti.mean() / num_inner
+            columns['min'][cursor] = ti.min() / num_inner
+        base_rows.append((key, *group_keys.values(), *params.values()))
+        sample_counts.append(stop - cursor)
+        cursor = stop
+
+    time_key = 'time' if record_all else 'min'
+
+    # The columns define a long-form pandas data array.
+    # Data in long-form makes it very easy to use seaborn.
+    data = pd.DataFrame({
+        label: column[:cursor] for label, column in columns.items()})
+    param_data = pd.DataFrame(base_rows, columns=base_labels)
+    # The string labels repeat for every sample, so store them as categories.
+    # This saves memory and lets groupby work with the integer codes.
+    string_labels = param_data.select_dtypes(include='object').columns
+    param_data = param_data.astype({k: 'category' for k in string_labels})
+    base_data = param_data.iloc[np.repeat(param_data.index, sample_counts)]
+    data = pd.concat([data, base_data.reset_index(drop=True)], axis=1)
+
+    if record_all:
+        # Show the min / mean if we record all. Both are computed in a single
+        # groupby, and the params are joined back from the per-key table.
+        time_stats = data.groupby('key', observed=True, sort=False)['time'].agg(['min', 'mean'])
+        stats_data = param_data.set_index('key').join(time_stats)
+        stats_data = stats_data.sort_values('min')
+    else:
+        stats_data = data
+
+    if use_openskill:
+        # Lets try a real ranking method
+        # https://github.com/OpenDebates/openskill.py
+        import openskill
+        method_ratings = {m: openskill.Rating() for m in basis['method']}
+
+    other_keys = sorted(set(stats_data.columns) - {
+        'key', 'method', 'min', 'mean', *group_key_labels.values()})
+    # Speedups are relative to the slowest method for each other setting of
+    # the parameters.
+    grouped = stats_data.groupby(other_keys, observed=True)
+    stats_data['mean_speedup'] = grouped['mean'].transform('max') / stats_data['mean']
+    stats_data['min_speedup'] = grouped['min'].transform('max') / stats_data['min']
+
+    if use_openskill:
+        # Stop updating once the ratings stop moving for a few games in a row,
+        # the remaining updates would only add noise. The games are played in
+        # a fixed random order, otherwise stopping early would only rate the
+        # first settings of the grid.
+        converge_thresh = 1e-3
+        converge_patience = 5
+        num_converged = 0
+        games = list(stats_data.groupby(other_keys, observed=True,
+                                        sort=False))
+        random.Random(0).shuffle(games)
+        for params, variants in games:
+            variants = variants.sort_values('mean')
+            ranking = variants['method'].reset_index(drop=True)
+            # The idea is that each setting of parameters is a game, and each
+            # "method" is a player. We rank the players by which is fastest,
+            # and update their ranking according to the Weng-Lin Bayes ranking
+            # model. This does not take the fact that some "games" (i.e.
+            # parameter settings) are more important than others, but it should
+            # be fairly robust on average.
+            old_ratings = [[r] for r in ub.take(method_ratings, ranking)]
+            new_values = openskill.rate(old_ratings)  # Not inplace
+            new_ratings = [openskill.Rating(*new[0]) for new in new_values]
+            method_ratings.update(ub.dzip(ranking, new_ratings))
+            delta = max(abs(new.mu - old[0].mu)
+                        for old, new in zip(old_ratings, new_ratings))
+            if delta < converge_thresh:
+                num_converged += 1
+                if num_converged >= converge_patience:
+                    break
+            else:
+                num_converged = 0
+
+    print('Statistics:')
+    print(stats_data)
+
+    if use_openskill:
+        from openskill import predict_win
+        win_prob = predict_win([[r] for r in method_ratings.values()])
+        skill_agg = pd.Series(ub.dzip(method_ratings.keys(), win_prob)).sort_values(ascending=False)
+        print('method_ratings = {}'.format(ub.urepr(method_ratings, nl=1)))
+        print('Aggregated Rankings =\n{}'.format(skill_agg))
+
+    if plot:
+        # import seaborn as sns
+        # kwplot autosns works well for IPython and script execution.
+        # not sure about notebooks.
+        import kwplot
+        sns = kwplot.autosns()
+        plt = kwplot.autoplt()
+
+        plotkw = {}
+        for gname, labels in group_labels.items():
+            if labels:
+                plotkw[gname] = group_key_labels[gname]
+
+        ax = kwplot.figure(fnum=1, doclf=True).gca()
+        sns.lineplot(data=data, x=xlabel, y=time_key, marker='o', ax=ax, **plotkw)
+        ax.set_title(plot_labels.get('title', 'Benchmark'))
+        ax.set_xlabel(plot_labels.get('x', xlabel))
+        ax.set_ylabel(plot_labels.get('y', 'Time'))
+        if xscale is not None:
+            ax.set_xscale(xscale)
+        if yscale is not None:
+            ax.set_yscale(yscale)
+
+        try:
+            __IPYTHON__
+        except NameError:
+            plt.show()
+
+    return data, stats_data
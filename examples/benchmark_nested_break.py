@@ -1,22 +1,49 @@
 
 
+# The pair searched for by the tuple comparison variants
+_TARGET = (20, 20)
+
+
 def benchmark_nested_break():
     """
     There are several ways to do a nested break, but which one is best?
 
     https://twitter.com/nedbat/status/1515345787563220996
     """
-    import ubelt as ub
-    import pandas as pd
+    import numpy as np
     import timerit
     import itertools as it
+    import operator
+    from collections import deque
+    from functools import partial
+    from benchmark_harness import run_benchmark
 
     def method1_itertools(iter1, iter2):
         for i, j in it.product(iter1, iter2):
             if i == 20 and j == 20:
                 break
 
+    def method1b_takewhile(iter1, iter2):
+        # The deque consumes the product in C and the predicate is a partial
+        # of a C comparison, so no bytecode runs per step.
+        deque(it.takewhile(partial(operator.ne, _TARGET),
+                           it.product(iter1, iter2)), maxlen=0)
+
+    def method1c_itertools_chained(iter1, iter2):
+        # A chained comparison instead of two comparisons joined by ``and``
+        for i, j in it.product(iter1, iter2):
+            if i == j == 20:
+                break
+
+    def method1d_itertools_tuple_eq(iter1, iter2):
+        # A single comparison against a constant tuple
+        for ij in it.product(iter1, iter2):
+            if ij == _TARGET:
+                break
+
     def method2_except(iter1, iter2):
+        # This is intentionally the naive version that defines its exception
+        # class on every call. See method2_5_except_predef for the hoisted one.
         class Found(Exception):
             pass
         try:
@@ -49,6 +76,28 @@ def benchmark_nested_break():
             if i == 20 and j == 20:
                 break
 
+    def genfunc_predef(iter1, iter2):
+        for i in iter1:
+            for j in iter2:
+                yield i, j
+
+    def method3_5_gendef_predef(iter1, iter2):
+        # Like method3_gendef, but the generator function is not redefined on
+        # every call.
+        for i, j in genfunc_predef(iter1, iter2):
+            if i == 20 and j == 20:
+                break
+
+    def method3b_yieldfrom(iter1, iter2):
+        # Same shape as method3_gendef, but the generator delegates to the C
+        # product iterator instead of running its own nested Python loops.
+        def genfunc():
+            yield from it.product(iter1, iter2)
+
+        for i, j in genfunc():
+            if i == 20 and j == 20:
+                break
+
     def method4_genexp(iter1, iter2):
         genexpr = ((i, j) for i in iter1 for j in iter2)
         for i, j in genexpr:
@@ -60,14 +109,35 @@ def benchmark_nested_break():
     # Change params here to modify number of trials
     ti = timerit.Timerit(1000, bestof=10, verbose=1)
 
+    # Each method is called several times inside each timed block so the cost
+    # of entering and exiting the timer is amortized for small sizes. All
+    # input styles are batched the same way so their times are comparable.
+    # The number of calls per block is roughly this budget divided by size.
+    # Recorded times are divided by the number of calls, but the verbose
+    # Timerit report still shows the time of a whole block.
+    batch_budget = 1000
+
     # if True, record every trail run and show variance in seaborn
     # if False, use the standard timerit min/mean measures
     RECORD_ALL = True
 
+    # if True, also rank the methods with OpenSkill
+    USE_OPENSKILL = False
+
     # These are the parameters that we benchmark over
-    import numpy as np
     basis = {
-        'method': ['method1_itertools', 'method2_except', 'method2_5_except_predef', 'method3_gendef', 'method4_genexp'],
+        'method': [
+            'method1_itertools',
+            'method1b_takewhile',
+            'method1c_itertools_chained',
+            'method1d_itertools_tuple_eq',
+            'method2_except',
+            'method2_5_except_predef',
+            'method3_gendef',
+            'method3_5_gendef_predef',
+            'method3b_yieldfrom',
+            'method4_genexp',
+        ],
         # 'n1': np.logspace(1, np.log2(100), 30, base=2).astype(int),
         # 'n2': np.logspace(1, np.log2(100), 30, base=2).astype(int),
         'size': np.logspace(1, np.log2(10000), 30, base=2).astype(int),
@@ -84,17 +154,17 @@ def benchmark_nested_break():
         'style': ['input_style'],
         'size': [],
     }
-    group_labels['hue'] = list(
-        (ub.oset(basis) - {xlabel} - xinput_labels) - set.union(*map(set, group_labels.values())))
-    grid_iter = list(ub.named_product(basis))
+
+    # The sizes are fixed, so compute the side length of each grid once
+    # instead of in every call to make_input.
+    sqrt_cache = {int(s): int(np.sqrt(s)) for s in basis['size']}
 
     def make_input(params):
         # Given the parameterization make the benchmark function input
         # n1 = params['n1']
         # n2 = params['n2']
         size = params['size']
-        n1 = int(np.sqrt(size))
-        n2 = int(np.sqrt(size))
+        n1 = n2 = sqrt_cache[size]
         if params['input_style'] == 'list':
             iter1 = list(range(n1))
             iter2 = list(range(n1))
@@ -119,138 +189,30 @@ def benchmark_nested_break():
             raise KeyError
         return {'iter1': iter1, 'iter2': iter2}
 
-    # For each variation of your experiment, create a row.
-    rows = []
-    for params in grid_iter:
-        # size = params['n1'] * params['n2']
-        # params['size'] = size
-        group_keys = {}
-        for gname, labels in group_labels.items():
-            group_keys[gname + '_key'] = ub.repr2(
-                ub.dict_isect(params, labels), compact=1, si=1)
-        key = ub.repr2(params, compact=1, si=1)
+    def make_call(params):
         # Make any modifications you need to compute input kwargs for each
         # method here.
-        kwargs = ub.dict_isect(params.copy(),  kw_labels)
-
-        method = method_lut[params['method']]
-        # Timerit will run some user-specified number of loops.
-        # and compute time stats with similar methodology to timeit
-        for timer in ti.reset(key):
-            # Put any setup logic you dont want to time here.
-            # ...
+        kwargs = {k: params[k] for k in kw_labels if k in params}
+        call = {'method': method_lut[params['method']], 'kwargs': kwargs,
+                'num_inner': max(1, batch_budget // params['size'])}
+        # Ranges and lists can be iterated many times, so they only need to be
+        # built once. Custom iterators are exhausted by each call, so they are
+        # rebuilt by the untimed setup for every call.
+        if params['input_style'] in {'range', 'list'}:
             kwargs.update(make_input(params))
-            with timer:
-                # Put the logic you want to time here
-                method(**kwargs)
-
-        if RECORD_ALL:
-            # Seaborn will show the variance if this is enabled, otherwise
-            # use the robust timerit mean / min times
-            # chunk_iter = ub.chunks(ti.times, ti.bestof)
-            # times = list(map(min, chunk_iter))  # TODO: timerit method for this
-            times = ti.robust_times()
-            for time in times:
-                row = {
-                    # 'mean': ti.mean(),
-                    'time': time,
-                    'key': key,
-                    **group_keys,
-                    **params,
-                }
-                rows.append(row)
         else:
-            row = {
-                'mean': ti.mean(),
-                'min': ti.min(),
-                'key': key,
-                **group_keys,
-                **params,
-            }
-            rows.append(row)
-
-    time_key = 'time' if RECORD_ALL else 'min'
-
-    # The rows define a long-form pandas data array.
-    # Data in long-form makes it very easy to use seaborn.
-    data = pd.DataFrame(rows)
-    data = data.sort_values(time_key)
-
-    if RECORD_ALL:
-        # Show the min / mean if we record all
-        min_times = data.groupby('key').min().rename({'time': 'min'}, axis=1)
-        mean_times = data.groupby('key')[['time']].mean().rename({'time': 'mean'}, axis=1)
-        stats_data = pd.concat([min_times, mean_times], axis=1)
-        stats_data = stats_data.sort_values('min')
-    else:
-        stats_data = data
-
-    USE_OPENSKILL = 0
-    if USE_OPENSKILL:
-        # Lets try a real ranking method
-        # https://github.com/OpenDebates/openskill.py
-        import openskill
-        method_ratings = {m: openskill.Rating() for m in basis['method']}
-
-    other_keys = sorted(set(stats_data.columns) - {'key', 'method', 'min', 'mean', 'hue_key', 'size_key', 'style_key'})
-    for params, variants in stats_data.groupby(other_keys):
-        variants = variants.sort_values('mean')
-        ranking = variants['method'].reset_index(drop=True)
-
-        mean_speedup = variants['mean'].max() / variants['mean']
-        stats_data.loc[mean_speedup.index, 'mean_speedup'] = mean_speedup
-        min_speedup = variants['min'].max() / variants['min']
-        stats_data.loc[min_speedup.index, 'min_speedup'] = min_speedup
-
-        if USE_OPENSKILL:
-            # The idea is that each setting of parameters is a game, and each
-            # "method" is a player. We rank the players by which is fastest,
-            # and update their ranking according to the Weng-Lin Bayes ranking
-            # model. This does not take the fact that some "games" (i.e.
-            # parameter settings) are more important than others, but it should
-            # be fairly robust on average.
-            old_ratings = [[r] for r in ub.take(method_ratings, ranking)]
-            new_values = openskill.rate(old_ratings)  # Not inplace
-            new_ratings = [openskill.Rating(*new[0]) for new in new_values]
-            method_ratings.update(ub.dzip(ranking, new_ratings))
-
-    print('Statistics:')
-    print(stats_data)
-
-    if USE_OPENSKILL:
-        from openskill import predict_win
-        win_prob = predict_win([[r] for r in method_ratings.values()])
-        skill_agg = pd.Series(ub.dzip(method_ratings.keys(), win_prob)).sort_values(ascending=False)
-        print('method_ratings = {}'.format(ub.repr2(method_ratings, nl=1)))
-        print('Aggregated Rankings =\n{}'.format(skill_agg))
-
-    plot = True
-    if plot:
-        # import seaborn as sns
-        # kwplot autosns works well for IPython and script execution.
-        # not sure about notebooks.
-        import kwplot
-        sns = kwplot.autosns()
-        plt = kwplot.autoplt()
-
-        plotkw = {}
-        for gname, labels in group_labels.items():
-            if labels:
-                plotkw[gname] = gname + '_key'
-
-        # Your variables may change
-        ax = kwplot.figure(fnum=1, doclf=True).gca()
-        sns.lineplot(data=data, x=xlabel, y=time_key, marker='o', ax=ax, **plotkw)
-        ax.set_title(f'Benchmark Nested Breaks: #Trials {ti.num}, bestof {ti.bestof}')
-        ax.set_xlabel(f'{xlabel}')
-        ax.set_ylabel('Time')
-        ax.set_xscale('log')
-        ax.set_yscale('log')
+            call['setup'] = lambda: make_input(params)
+        return call
 
-        try:
-            __IPYTHON__
-        except NameError:
-            plt.show()
+    plot_labels = {
+        'x': xlabel,
+        'y': 'Time',
+        'title': f'Benchmark Nested Breaks: #Trials {ti.num}, bestof {ti.bestof}',
+    }
+    run_benchmark(ti, basis, make_call, xlabel, group_labels=group_labels,
+                  xinput_labels=xinput_labels, plot_labels=plot_labels,
+                  xscale='log', yscale='log', record_all=RECORD_ALL,
+                  use_openskill=USE_OPENSKILL)
 
 
 if __name__ == '__main__':
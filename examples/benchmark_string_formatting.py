@@ -40,10 +40,8 @@ def build_fstring_function(num_vars, arg_type):
 
 
 def benchmark_template():
-    import ubelt as ub
-    import pandas as pd
     import timerit
-    import inspect
+    from benchmark_harness import run_benchmark
 
     plot_labels = {
         'x': 'Number of arguments',
@@ -81,10 +79,15 @@ def benchmark_template():
     # if False, use the standard timerit min/mean measures
     RECORD_ALL = True
 
+    # if True, also rank the methods with OpenSkill
+    USE_OPENSKILL = False
+
     # These are the parameters that we benchmark over
     basis = {
         'method': list(method_lut) + [
-            'fstring'
+            'fstring',
+            'format_bound',
+            'percent_bound',
         ],
         'num_vars': [1, 2, 3, 4, 5],
         # 'num_vars': list(range(1, 10)),
@@ -96,10 +99,6 @@ def benchmark_template():
             'string'
         ],
     }
-    # Set these to param labels that directly transfer to method kwargs
-    kw_labels = list(inspect.signature(ub.peek(method_lut.values())).parameters)
-    # i.e.
-    # kw_labels = ['xparam', 'y', 'z']
     # Set these to empty lists if they are not used, removing dict items breaks
     # the code.
     xlabel = 'num_vars'
@@ -107,23 +106,11 @@ def benchmark_template():
         'style': ['arg_type'],
         # 'size': ['zparam'],
     }
-    group_labels['hue'] = list(
-        (ub.oset(basis) - {xlabel}) - set.union(*map(set, group_labels.values())))
-    grid_iter = list(ub.named_product(basis))
 
-    # For each variation of your experiment, create a row.
-    rows = []
-    for params in grid_iter:
-        params = ub.udict(params)
-        group_keys = {}
-        for gname, labels in group_labels.items():
-            group_keys[gname + '_key'] = ub.urepr(
-                params & labels, compact=1, si=1)
-        key = ub.urepr(params, compact=1, si=1)
-        # Make any modifications you need to compute input kwargs for each
-        # method here.
-        kwargs = params & kw_labels
-        args = tuple()
+    def make_call(params):
+        # Make any modifications you need to compute input args for each
+        # method here. Inputs are passed positionally to avoid unpacking a
+        # kwargs dictionary on every call.
 
         arg_type = params['arg_type']
         num_vars = params['num_vars']
@@ -146,134 +133,35 @@ def benchmark_template():
         if params['method'] == 'fstring':
             method = build_fstring_function(num_vars, arg_type)
             args = tuple([arg_part] * params['num_vars'])
-            kwargs = {}
         elif params['method'] == 'format_method':
             template_part = '{:' + fmt_code + '}'
-            kwargs['template'] = ' '.join([template_part] * params['num_vars'])
-            kwargs['args'] = tuple([arg_part] * params['num_vars'])
+            template = ' '.join([template_part] * params['num_vars'])
+            args = (template, tuple([arg_part] * params['num_vars']))
             method = method_lut[params['method']]
         elif params['method'] == 'percent_operator':
             template_part = '%' + fmt_code
-            kwargs['template'] = ' '.join([template_part] * params['num_vars'])
-            kwargs['args'] = tuple([arg_part] * params['num_vars'])
+            template = ' '.join([template_part] * params['num_vars'])
+            args = (template, tuple([arg_part] * params['num_vars']))
             method = method_lut[params['method']]
+        elif params['method'] == 'format_bound':
+            # Bind the template method before timing. Compared to
+            # format_method, this only removes the method lookup; the
+            # template is still parsed on every call.
+            template_part = '{:' + fmt_code + '}'
+            template = ' '.join([template_part] * params['num_vars'])
+            method = template.format
+            args = tuple([arg_part] * params['num_vars'])
+        elif params['method'] == 'percent_bound':
+            template_part = '%' + fmt_code
+            template = ' '.join([template_part] * params['num_vars'])
+            method = template.__mod__
+            args = (tuple([arg_part] * params['num_vars']),)
 
-        # Timerit will run some user-specified number of loops.
-        # and compute time stats with similar methodology to timeit
-        for timer in ti.reset(key):
-            # Put any setup logic you dont want to time here.
-            # ...
-            with timer:
-                # Put the logic you want to time here
-                method(*args, **kwargs)
-
-        if RECORD_ALL:
-            # Seaborn will show the variance if this is enabled, otherwise
-            # use the robust timerit mean / min times
-            # chunk_iter = ub.chunks(ti.times, ti.bestof)
-            # times = list(map(min, chunk_iter))  # TODO: timerit method for this
-            times = ti.robust_times()
-            for time in times:
-                row = {
-                    # 'mean': ti.mean(),
-                    'time': time,
-                    'key': key,
-                    **group_keys,
-                    **params,
-                }
-                rows.append(row)
-        else:
-            row = {
-                'mean': ti.mean(),
-                'min': ti.min(),
-                'key': key,
-                **group_keys,
-                **params,
-            }
-            rows.append(row)
-
-    time_key = 'time' if RECORD_ALL else 'min'
-
-    # The rows define a long-form pandas data array.
-    # Data in long-form makes it very easy to use seaborn.
-    data = pd.DataFrame(rows)
-    data = data.sort_values(time_key)
-
-    if RECORD_ALL:
-        # Show the min / mean if we record all
-        min_times = data.groupby('key').min().rename({'time': 'min'}, axis=1)
-        mean_times = data.groupby('key')[['time']].mean().rename({'time': 'mean'}, axis=1)
-        stats_data = pd.concat([min_times, mean_times], axis=1)
-        stats_data = stats_data.sort_values('min')
-    else:
-        stats_data = data
-
-    USE_OPENSKILL = 0
-    if USE_OPENSKILL:
-        # Lets try a real ranking method
-        # https://github.com/OpenDebates/openskill.py
-        import openskill
-        method_ratings = {m: openskill.Rating() for m in basis['method']}
-
-    other_keys = sorted(set(stats_data.columns) - {'key', 'method', 'min', 'mean', 'hue_key', 'size_key', 'style_key'})
-    for params, variants in stats_data.groupby(other_keys):
-        variants = variants.sort_values('mean')
-        ranking = variants['method'].reset_index(drop=True)
-
-        mean_speedup = variants['mean'].max() / variants['mean']
-        stats_data.loc[mean_speedup.index, 'mean_speedup'] = mean_speedup
-        min_speedup = variants['min'].max() / variants['min']
-        stats_data.loc[min_speedup.index, 'min_speedup'] = min_speedup
-
-        if USE_OPENSKILL:
-            # The idea is that each setting of parameters is a game, and each
-            # "method" is a player. We rank the players by which is fastest,
-            # and update their ranking according to the Weng-Lin Bayes ranking
-            # model. This does not take the fact that some "games" (i.e.
-            # parameter settings) are more important than others, but it should
-            # be fairly robust on average.
-            old_ratings = [[r] for r in ub.take(method_ratings, ranking)]
-            new_values = openskill.rate(old_ratings)  # Not inplace
-            new_ratings = [openskill.Rating(*new[0]) for new in new_values]
-            method_ratings.update(ub.dzip(ranking, new_ratings))
-
-    print('Statistics:')
-    print(stats_data)
-
-    if USE_OPENSKILL:
-        from openskill import predict_win
-        win_prob = predict_win([[r] for r in method_ratings.values()])
-        skill_agg = pd.Series(ub.dzip(method_ratings.keys(), win_prob)).sort_values(ascending=False)
-        print('Aggregated Rankings =\n{}'.format(skill_agg))
-
-    plot = True
-    if plot:
-        # import seaborn as sns
-        # kwplot autosns works well for IPython and script execution.
-        # not sure about notebooks.
-        import kwplot
-        sns = kwplot.autosns()
-        plt = kwplot.autoplt()
-
-        plotkw = {}
-        for gname, labels in group_labels.items():
-            if labels:
-                plotkw[gname] = gname + '_key'
-
-        # Your variables may change
-        ax = kwplot.figure(fnum=1, doclf=True).gca()
-        sns.lineplot(data=data, x=xlabel, y=time_key, marker='o', ax=ax, **plotkw)
-        ax.set_title(plot_labels['title'])
-        ax.set_xlabel(plot_labels['x'])
-        ax.set_ylabel(plot_labels['y'])
-        # ax.set_xscale('log')
-        # ax.set_xscale('log')
-        # ax.set_yscale('log')
+        return {'method': method, 'args': args}
 
-        try:
-            __IPYTHON__
-        except NameError:
-            plt.show()
+    run_benchmark(ti, basis, make_call, xlabel, group_labels=group_labels,
+                  plot_labels=plot_labels, record_all=RECORD_ALL,
+                  use_openskill=USE_OPENSKILL)
 
 
 if __name__ == '__main__':
@@ -1,9 +1,73 @@
-from xdoctest.utils import CaptureStdout
 from timerit import Timer, Timerit
-from functools import partial
+from functools import partial, lru_cache
+from contextlib import contextmanager, redirect_stdout
 
 import timerit
+import pytest
 import random
+import gc
+import io
+import re
+
+
+def _noop():
+    pass
+
+
+class _CaptureBuffer(io.StringIO):
+    """
+    A StringIO that exposes its value like xdoctest's CaptureStdout and counts
+    the newlines written to it as they arrive.
+    """
+    nl = 0
+
+    def write(self, s):
+        self.nl += s.count('\n')
+        return super().write(s)
+
+    @property
+    def text(self):
+        return self.getvalue()
+
+
+@contextmanager
+def _cap():
+    """
+    Lightweight replacement for ``xdoctest.utils.CaptureStdout`` that simply
+    redirects stdout into a buffer.
+    """
+    buf = _CaptureBuffer()
+    with redirect_stdout(buf):
+        yield buf
+
+
+@lru_cache(maxsize=None)
+def _count_pattern(needles):
+    return re.compile('|'.join(map(re.escape, needles)))
+
+
+def _counts(text, needles):
+    r"""
+    Counts non-overlapping occurrences of each needle in a single pass.
+
+    Example:
+        >>> _counts('foo\nbar\nfoo', ('\n', 'foo'))
+        {'\n': 2, 'foo': 2}
+    """
+    counts = dict.fromkeys(needles, 0)
+    for match in _count_pattern(needles).finditer(text):
+        counts[match.group()] += 1
+    return counts
+
+
+_LOOPS_LINE = '3 loops, best of 3'
+
+
+def _run_verbose(verbose, factory=Timerit):
+    """ Times a noop with the given verbosity and returns the capture buffer """
+    with _cap() as cap:
+        factory(3, label='foo', verbose=verbose).call(_noop)
+    return cap
 
 
 class HackedTime(object):
@@ -14,7 +78,10 @@ class HackedTime(object):
         inc (float): number of seconds to ellapse between each call
     """
     def __init__(self, inc=1.0, noise=0, rng=None):
-        if rng is None:
+        if not noise:
+            # Without noise there is no need to seed or draw from an rng
+            self.rng = None
+        elif rng is None:
             self.rng = random
         else:
             self.rng = random.Random(rng)
@@ -22,7 +89,10 @@ class HackedTime(object):
         self.inc = inc
         self.noise = noise
     def __call__(self):
-        self.time += abs(self.inc + self.rng.normalvariate(0, self.noise))
+        if self.rng is None:
+            self.time += abs(self.inc)
+        else:
+            self.time += abs(self.inc + self.rng.normalvariate(0, self.noise))
         return self.time
 
 
@@ -36,181 +106,127 @@ class HackedTimer(Timer):
         self.inc = inc
 
 
+@lru_cache(maxsize=16)
+def _hacked_timer_cls(inc):
+    """ Returns a shared HackedTimer factory for each increment """
+    return partial(HackedTimer, inc=inc)
+
+
 class HackedTimerit(Timerit):
     """ Creates a Timerit object where timings are known for testing """
     def __init__(self, *args, **kw):
         inc = kw.pop('inc', 42)
-        kw['timer_cls'] = partial(HackedTimer, inc=inc)
+        kw['timer_cls'] = _hacked_timer_cls(inc)
         super(HackedTimerit, self).__init__(*args, **kw)
         self.inc = inc
         self._asciimode = True  # a hacked timer will always return ascii
 
 
 def test_timer_nonewline():
-    with CaptureStdout() as cap:
+    with _cap() as cap:
         timer = Timer(newline=False, verbose=1)
         timer.tic()
         timer.toc()
-    assert cap.text.replace('u', '').startswith("\ntic('')...toc('')")
-
+    # Python 2 reprs the label with a unicode prefix
+    assert cap.text.startswith(("\ntic('')...toc('')", "\ntic(u'')...toc(u'')"))
 
-def test_timerit_verbose():
-    with CaptureStdout() as cap:
-        Timerit(3, label='foo', verbose=0).call(lambda: None)
-    assert cap.text == ''
 
-    with CaptureStdout() as cap:
-        Timerit(3, label='foo', verbose=1).call(lambda: None)
-    assert cap.text.count('\n') == 1
-    assert cap.text.count('foo') == 1
+# The expected number of newlines and labels printed at each verbosity
+_VERBOSE_CASES = ((0, 0, 0), (1, 1, 1), (2, 2, 1), (3, 4, 2), (4, 4, 2))
 
-    with CaptureStdout() as cap:
-        Timerit(3, label='foo', verbose=2).call(lambda: None)
-    assert cap.text.count('\n') == 2
-    assert cap.text.count('foo') == 1
+# The expected number of '3 loops, best of 3' lines at each verbosity
+_VERBOSE_LOOPS = (0, 0, 1, 2, 2)
 
-    with CaptureStdout() as cap:
-        Timerit(3, label='foo', verbose=3).call(lambda: None)
-    assert cap.text.count('\n') == 4
-    assert cap.text.count('foo') == 2
 
-    with CaptureStdout() as cap:
-        Timerit(3, label='foo', verbose=4).call(lambda: None)
-    assert cap.text.count('\n') == 4
-    assert cap.text.count('foo') == 2
+@pytest.mark.parametrize('verbose,nl,foo', _VERBOSE_CASES)
+def test_timerit_verbose(verbose, nl, foo):
+    cap = _run_verbose(verbose)
+    if verbose == 0:
+        assert cap.text == ''
+    assert cap.nl == nl
+    assert _counts(cap.text, ('foo',)) == {'foo': foo}
 
 
-def test_timerit_verbose_via_package():
-    with CaptureStdout() as cap:
+def test_timerit_defaults_via_package():
+    with _cap() as cap:
         for _ in timerit:
             pass
-    assert cap.text.count('\n') == 2
-
-    with CaptureStdout() as cap:
-        timerit().call(lambda: None)
-    assert cap.text.count('\n') == 2
-
-    with CaptureStdout() as cap:
-        timerit(3).call(lambda: None)
-    assert cap.text.count('\n') == 2
-    assert cap.text.count('3 loops, best of 3') == 1
-
-    with CaptureStdout() as cap:
-        timerit(num=3).call(lambda: None)
-    assert cap.text.count('\n') == 2
-    assert cap.text.count('3 loops, best of 3') == 1
-
-    with CaptureStdout() as cap:
-        timerit(3, label='foo', verbose=0).call(lambda: None)
-    assert cap.text == ''
-
-    with CaptureStdout() as cap:
-        timerit(3, label='foo', verbose=1).call(lambda: None)
-    assert cap.text.count('\n') == 1
-    assert cap.text.count('foo') == 1
-
-    with CaptureStdout() as cap:
-        timerit(3, label='foo', verbose=2).call(lambda: None)
-    assert cap.text.count('\n') == 2
-    assert cap.text.count('foo') == 1
-    assert cap.text.count('3 loops, best of 3') == 1
-
-    with CaptureStdout() as cap:
-        timerit(3, label='foo', verbose=3).call(lambda: None)
-    assert cap.text.count('\n') == 4
-    assert cap.text.count('foo') == 2
-    assert cap.text.count('3 loops, best of 3') == 2
-
-    with CaptureStdout() as cap:
-        timerit(3, label='foo', verbose=4).call(lambda: None)
-    assert cap.text.count('\n') == 4
-    assert cap.text.count('foo') == 2
-    assert cap.text.count('3 loops, best of 3') == 2
-
-
-def test_hacked_timerit_verbose():
-    import textwrap
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(3, label='foo', verbose=0).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(3, label='foo', verbose=1).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        Timed best=42.000 s, mean=42.000 +- 0.0 s for foo
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(3, label='foo', verbose=2).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        Timed foo for: 3 loops, best of 3
-            time per loop: best=42.000 s, mean=42.000 +- 0.0 s
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(3, label='foo', verbose=3).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        Timing foo for: 3 loops, best of 3
-        Timed foo for: 3 loops, best of 3
-            body took: 126.000 s
-            time per loop: best=42.000 s, mean=42.000 +- 0.0 s
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(num=None, label='foo', verbose=0, min_duration=100).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(num=None, label='foo', verbose=1, min_duration=100).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        Timed best=42.000 s, mean=42.000 +- 0.0 s for foo
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(num=None, label='foo', verbose=2, min_duration=100).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        Timed foo for: 3 loops, best of 3
-            time per loop: best=42.000 s, mean=42.000 +- 0.0 s
-        ''').strip()
-
-    with CaptureStdout(suppress=False) as cap:
-        HackedTimerit(num=None, label='foo', verbose=3, min_duration=100).call(lambda: None)
-    assert cap.text.strip() == textwrap.dedent(
-        '''
-        Timing foo for: 100.000s
-        Timed foo for: 3 loops, best of 3
-            body took: 126.000 s
-            time per loop: best=42.000 s, mean=42.000 +- 0.0 s
-        ''').strip()
+    assert cap.nl == 2
+
+    with _cap() as cap:
+        timerit().call(_noop)
+    assert cap.nl == 2
+
+    with _cap() as cap:
+        timerit(3).call(_noop)
+    assert cap.nl == 2
+    assert _counts(cap.text, (_LOOPS_LINE,)) == {_LOOPS_LINE: 1}
+
+    with _cap() as cap:
+        timerit(num=3).call(_noop)
+    assert cap.nl == 2
+    assert _counts(cap.text, (_LOOPS_LINE,)) == {_LOOPS_LINE: 1}
+
+
+@pytest.mark.parametrize('verbose,nl,foo,loops', [
+    case + (loops,) for case, loops in zip(_VERBOSE_CASES, _VERBOSE_LOOPS)
+])
+def test_timerit_verbose_via_package(verbose, nl, foo, loops):
+    cap = _run_verbose(verbose, factory=timerit)
+    if verbose == 0:
+        assert cap.text == ''
+    assert cap.nl == nl
+    counts = _counts(cap.text, ('foo', _LOOPS_LINE))
+    assert counts == {'foo': foo, _LOOPS_LINE: loops}
+
+
+# Expected output of a HackedTimerit labeled foo at each verbosity
+_EXPECT_V1 = 'Timed best=42.000 s, mean=42.000 +- 0.0 s for foo'
+_EXPECT_V2 = (
+    'Timed foo for: 3 loops, best of 3\n'
+    '    time per loop: best=42.000 s, mean=42.000 +- 0.0 s'
+)
+_EXPECT_V3 = (
+    'Timed foo for: 3 loops, best of 3\n'
+    '    body took: 126.000 s\n'
+    '    time per loop: best=42.000 s, mean=42.000 +- 0.0 s'
+)
+
+
+@pytest.mark.parametrize('kwargs,expected', [
+    (dict(num=3, verbose=0), ''),
+    (dict(num=3, verbose=1), _EXPECT_V1),
+    (dict(num=3, verbose=2), _EXPECT_V2),
+    (dict(num=3, verbose=3), 'Timing foo for: 3 loops, best of 3\n' + _EXPECT_V3),
+    (dict(num=None, verbose=0, min_duration=100), ''),
+    (dict(num=None, verbose=1, min_duration=100), _EXPECT_V1),
+    (dict(num=None, verbose=2, min_duration=100), _EXPECT_V2),
+    (dict(num=None, verbose=3, min_duration=100), 'Timing foo for: 100.000s\n' + _EXPECT_V3),
+])
+def test_hacked_timerit_verbose(kwargs, expected):
+    with _cap() as cap:
+        HackedTimerit(label='foo', **kwargs).call(_noop)
+    assert cap.text.strip() == expected
 
 
 def test_timer_default_verbosity():
 
-    with CaptureStdout() as cap:
+    with _cap() as cap:
         Timer('').tic().toc()
     assert cap.text == '', 'should be quiet by default when label is not given'
 
-    with CaptureStdout() as cap:
+    with _cap() as cap:
         Timer('a label').tic().toc()
     assert cap.text != '', 'should be verbose by default when label is given'
 
 
 def test_timerit_default_verbosity():
-    with CaptureStdout() as cap:
-        Timerit(10, '').call(lambda: None)
+    with _cap() as cap:
+        Timerit(10, '').call(_noop)
     assert cap.text == '', 'should be quiet by default when label is not given'
 
-    with CaptureStdout() as cap:
-        Timerit(10, 'alabel').call(lambda: None)
+    with _cap() as cap:
+        Timerit(10, 'alabel').call(_noop)
     assert cap.text != '', 'should be verbose by default when label is given'
 
 
@@ -224,7 +240,7 @@ def test_timer_error():
 
 
 def test_verbose_report():
-    t = Timerit(10, 'alabel').call(lambda: None)
+    t = Timerit(10, 'alabel').call(_noop)
     t.report()
 
 
@@ -257,6 +273,16 @@ def test_nonstandard_timerit_concise():
     assert ti.std() == 0
 
 
+def test_timerit_stops_when_stable():
+    # The hacked times never improve, so the loop stops after the first batch
+    # plus two stable batches, long before min_duration is reached.
+    ti = HackedTimerit(num=None, bestof=3, min_duration=1e9,
+                       min_stable_batches=2)
+    ti.call(_noop)
+    assert ti.n_loops == 9
+    assert ti.min() == ti.inc
+
+
 def test_timer_context():
 
     class ManualTime(object):
@@ -297,36 +323,172 @@ def test_timer_context():
     assert t.elapsed == 3
 
     # Test that timerit works without a context manager
-    for timer in ManualTimerit(num=100, bestof=10, verbose=2):
+    for timer in ManualTimerit(num=3, bestof=3, verbose=0):
         pass
     assert timer.parent.total_time == 0
     assert timer.parent.min() == 0
 
-    for timer in ManualTimerit(num=100, bestof=10, verbose=2):
+    for timer in ManualTimerit(num=3, bestof=3, verbose=0):
         manual_time.tic()
-    assert timer.parent.total_time == 100
+    assert timer.parent.total_time == 3
     assert timer.parent.min() == 1
 
-    for timer in ManualTimerit(num=100, bestof=10, verbose=2):
+    for timer in ManualTimerit(num=3, bestof=3, verbose=0):
         manual_time.tic(2)
-    assert timer.parent.total_time == 200
+    assert timer.parent.total_time == 6
     assert timer.parent.min() == 2
 
     # Test that timerit only records time in a context manager when given
-    for timer in ManualTimerit(num=100, bestof=10, verbose=2):
+    for timer in ManualTimerit(num=3, bestof=3, verbose=0):
         manual_time.tic()
         with timer:
             pass
     assert timer.parent.total_time == 0
     assert timer.parent.min() == 0
 
-    for timer in ManualTimerit(num=100, bestof=10, verbose=2):
+    for timer in ManualTimerit(num=3, bestof=3, verbose=0):
         manual_time.tic()
         with timer:
             manual_time.tic(2)
-    assert timer.parent.total_time == 200
+    assert timer.parent.total_time == 6
     assert timer.parent.min() == 2
 
+    # A block that does not use the context manager falls back on the time of
+    # the whole block, even if a previous block used it.
+    for idx, timer in enumerate(ManualTimerit(num=2, bestof=1, verbose=0)):
+        manual_time.tic()
+        if idx == 0:
+            with timer:
+                manual_time.tic(2)
+    assert timer.parent.times == [2, 1]
+
+    # Assigning times replaces the measurements used by the stats
+    timer.parent.times = [3, 4]
+    assert timer.parent.times == [3, 4]
+    assert timer.parent.min() == 3
+
+
+def test_timerit_progress_while_iterating():
+    ti = HackedTimerit(num=5, verbose=0)
+    for idx, timer in enumerate(ti):
+        assert ti.n_loops == idx
+        assert ti.total_time == idx * ti.inc
+        with timer:
+            pass
+        if idx == 2:
+            break
+    assert ti.n_loops == 2
+    assert ti.total_time == 2 * ti.inc
+
+
+def test_timer_subclass_tic_toc():
+    """
+    The context manager of a timer calls tic and toc, and Timerit.call only
+    reads the clock itself when the timer class does not customize them.
+    """
+    calls = []
+
+    class SyncTimer(Timer):
+        def tic(self):
+            calls.append('tic')
+            return super().tic()
+
+        def toc(self):
+            calls.append('toc')
+            return super().toc()
+
+    class EnterTimer(SyncTimer):
+        def __enter__(self):
+            calls.append('enter')
+            return super().__enter__()
+
+    class RawTimer(Timer):
+        def _raw_tic(self):
+            calls.append('raw_tic')
+            return super()._raw_tic()
+
+    with SyncTimer(verbose=0):
+        pass
+    assert calls == ['tic', 'toc']
+    with Timer(verbose=0) as timer:
+        pass
+    assert timer.elapsed >= 0
+
+    calls.clear()
+    with EnterTimer(verbose=0):
+        pass
+    assert calls == ['enter', 'tic', 'toc']
+
+    # Timerit.call times each call with the customized methods
+    calls.clear()
+    Timerit(num=3, verbose=0, timer_cls=SyncTimer).call(_noop)
+    assert calls == ['tic', 'toc'] * 3
+
+    calls.clear()
+    Timerit(num=3, verbose=0, timer_cls=EnterTimer).call(_noop)
+    assert calls == ['enter', 'tic', 'toc'] * 3
+
+    calls.clear()
+    Timerit(num=3, verbose=0, timer_cls=RawTimer).call(_noop)
+    assert calls == ['raw_tic'] * 3
+
+
+def test_timerit_num_inner():
+    # The hacked clock advances once per read, so each loop of 4 calls
+    # measures a single increment
+    ti = HackedTimerit(num=6, bestof=3, num_inner=4, verbose=0).call(_noop)
+    assert ti.n_loops == 6
+    assert ti.min() == ti.inc / 4
+    assert ti.total_time == 6 * ti.inc
+
+    # When stopping on stable times, min_duration and total_time count the
+    # real elapsed time of each loop rather than the time per call
+    ti = HackedTimerit(num=None, bestof=3, min_duration=10 * 42,
+                       min_stable_batches=10 ** 6, num_inner=4, verbose=0)
+    ti.call(_noop)
+    assert ti.n_loops == 11
+    assert ti.total_time == 11 * ti.inc
+    assert ti.min() == ti.inc / 4
+
+    for bad in [0, -1, 2.5, True, 'fast']:
+        with pytest.raises(ValueError):
+            Timerit(num_inner=bad)
+
+
+def test_timerit_gc_state():
+    assert gc.isenabled()
+    for _ in Timerit(num=2, verbose=0):
+        assert not gc.isenabled()
+    for _ in Timerit(num=2, verbose=0, disable_gc=False):
+        assert gc.isenabled()
+    if hasattr(gc, 'freeze'):
+        for _ in Timerit(num=2, verbose=0, disable_gc='freeze'):
+            assert gc.isenabled()
+            assert gc.get_freeze_count() > 0
+        assert gc.get_freeze_count() == 0
+        # Objects frozen by the caller stay frozen, and objects created since
+        # are still frozen while timing
+        gc.freeze()
+        try:
+            num_frozen = gc.get_freeze_count()
+            garbage = [[] for _ in range(100)]
+            for _ in Timerit(num=2, verbose=0, disable_gc='freeze'):
+                assert gc.get_freeze_count() >= num_frozen + len(garbage)
+            assert gc.get_freeze_count() >= num_frozen + len(garbage)
+        finally:
+            gc.unfreeze()
+
+    # The gc is restored even if the timed code raises
+    def _raise():
+        assert not gc.isenabled()
+        raise ValueError
+    with pytest.raises(ValueError):
+        Timerit(num=2, verbose=0).call(_raise)
+    with pytest.raises(ValueError):
+        for _ in Timerit(num=2, verbose=0):
+            _raise()
+    assert gc.isenabled()
+
 
 if __name__ == '__main__':
     r"""
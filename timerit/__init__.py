@@ -28,10 +28,18 @@ a single line, but including more is trivial.
 __version__ = '1.1.1'
 
 import sys
+from inspect import signature
 from .core import (Timer, Timerit,)
 
 __all__ = ['Timer', 'Timerit']
 
+# The signature of Timerit is fixed, so only introspect it once.
+_TIMERIT_SIGNATURE = signature(Timerit)
+
+
+# Interactive defaults used by the module-level call
+_DEFAULT_KW = {'num': None, 'verbose': 2, 'bestof': 5}
+
 
 # The following code follows [SO1060796]_ to enrich a module with `__call__()`
 # and `__iter__()` methods for Python versions 3.5+.  In the future, if
@@ -44,7 +52,14 @@ __all__ = ['Timer', 'Timerit']
 #     .. [MyPy9240] https://github.com/python/mypy/issues/9240
 
 
-class TimeritModule(sys.modules[__name__].__class__):  # type: ignore
+_ModuleType = sys.modules[__name__].__class__
+if _ModuleType.__name__ == 'TimeritModule':
+    # The module is being reloaded, do not stack another subclass on top of
+    # the one created by the previous import.
+    _ModuleType = _ModuleType.__base__
+
+
+class TimeritModule(_ModuleType):  # type: ignore
 
     def __iter__(self):
         """
@@ -70,10 +85,10 @@ class TimeritModule(sys.modules[__name__].__class__):  # type: ignore
             >>> for _ in timerit:
             >>>     math.factorial(100)
         """
-        from inspect import signature
-        sig = signature(Timerit).bind(*args, **kwargs)
-        kwargs = {'num': None, 'verbose': 2, 'bestof': 5, **sig.arguments}
+        if args:
+            kwargs = _TIMERIT_SIGNATURE.bind(*args, **kwargs).arguments
+        kwargs = {**_DEFAULT_KW, **kwargs}
         return Timerit(**kwargs)
 
 sys.modules[__name__].__class__ = TimeritModule
-del sys, TimeritModule
+del sys, signature, TimeritModule, _ModuleType
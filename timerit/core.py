@@ -47,22 +47,22 @@ Example:
     tic('Timer demo!')
     ...toc('Timer demo!')=0.1959s
 """
+import gc
+import itertools as it
+import math
+import operator
 import time
 import sys
-import itertools as it
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict, Counter
+from functools import lru_cache
+from timerit.relative import Relative
 
 __all__ = ['Timer', 'Timerit']
 
 
-# If sys.version >= 3.7, then use time.perf_counter_ns
-if sys.version_info[0:2] >= (3, 7):
-    if hasattr(time, 'perf_counter_ns'):
-        default_counter = 'perf_counter_ns'
-    else:
-        default_counter = 'perf_counter'
-else:
-    default_counter = 'perf_counter'
+# Use the integer nanosecond counter when it exists (Python 3.7+)
+default_counter = ('perf_counter_ns' if hasattr(time, 'perf_counter_ns') else
+                   'perf_counter')
 
 
 class Timer:
@@ -113,6 +113,12 @@ class Timer:
 
     _default_counter = default_counter
 
+    # Slots make attribute access in the timing loop cheaper. Subclasses that
+    # do not define __slots__ can still set arbitrary attributes. The parent
+    # slot is set by Timerit on the timers it yields.
+    __slots__ = ('label', 'verbose', 'newline', 'write', 'flush', 'parent',
+                 '_raw_elapsed', '_raw_tstart', '_to_seconds', '_time')
+
     def __init__(self, label='', verbose=None, newline=True, counter='auto'):
         """
         Args:
@@ -140,8 +146,13 @@ class Timer:
         # self.elapsed = -1
         self._raw_elapsed = -1
         self._raw_tstart = -1
-        self.write = sys.stdout.write
-        self.flush = sys.stdout.flush
+        # Silent timers (e.g. the ones used by Timerit) never write, so stdout
+        # is only bound when needed
+        if verbose:
+            self.write = sys.stdout.write
+            self.flush = sys.stdout.flush
+        else:
+            self.write = self.flush = None
 
         if isinstance(counter, str):
             if counter == 'auto':
@@ -179,6 +190,15 @@ class Timer:
         """
         return self._raw_elapsed * self._to_seconds
 
+    def _bind_stdout(self):
+        """
+        Binds stdout for a timer that was created silent and made verbose.
+        """
+        if self.write is None:
+            self.write = sys.stdout.write
+        if self.flush is None:
+            self.flush = sys.stdout.flush
+
     def _raw_tic(self):
         self._raw_tstart = self._time()
 
@@ -194,10 +214,11 @@ class Timer:
             Timer: self
         """
         if self.verbose:
-            self.flush()
-            self.write('\ntic(%r)' % self.label)
+            self._bind_stdout()
+            text = '\ntic(%r)' % self.label
             if self.newline:
-                self.write('\n')
+                text += '\n'
+            self.write(text)
             self.flush()
         self._raw_tic()
         return self
@@ -209,9 +230,9 @@ class Timer:
         Returns:
             float: Amount of time that passed in seconds since the last tic.
         """
-        self._raw_toc()
-        elapsed = self.elapsed
+        elapsed = self._raw_toc() * self._to_seconds
         if self.verbose:
+            self._bind_stdout()
             self.write('...toc(%r)=%.4fs\n' % (self.label, elapsed))
             self.flush()
         return elapsed
@@ -279,7 +300,8 @@ class Timerit:
     _default_precision_type = 'f'  # could also be reasonably be 'g' or ''
 
     def __init__(self, num=1, label=None, bestof=3, unit=None, verbose=None,
-                 disable_gc=True, timer_cls=None, min_duration=0.2):
+                 disable_gc=True, timer_cls=None, min_duration=0.2,
+                 min_stable_batches=None, collect_before=True, num_inner=1):
         """
         Args:
             num (int | None):
@@ -306,20 +328,53 @@ class Timerit:
                 written at levels 1, 2, and 3. If unspecified, defaults to 1 if
                 label is given and 0 otherwise.
 
-            disable_gc (bool):
+            disable_gc (bool | str):
                 If True, disables the garbage collector while timing, defaults to
-                True.
+                True. If 'freeze', the collector stays enabled, but objects
+                that exist before timing are moved to a permanent generation
+                with :func:`gc.freeze`, so collections while timing only scan
+                objects created by the timed code (Python 3.7+, otherwise
+                this is the same as True).
 
             timer_cls (None | Any):
                 If specified, replaces the default :class:`Timer` class with a
-                customized one. Mainly useful for testing.
+                customized one. Mainly useful for testing. :func:`call` reads
+                the clock of the timer directly, unless the class customizes
+                ``tic``, ``toc``, ``_raw_tic``, ``_raw_toc``, or the context
+                manager, in which case each call is timed with them.
 
             min_duration (float):
                 Run the loop until the given amount of time has elapsed.
                 Ignored unless ``num is None``.
+
+            min_stable_batches (int | None):
+                If specified, the loop may also stop before ``min_duration``
+                has elapsed once the best time of each batch of ``bestof``
+                loops has not improved by more than 1% for this many
+                consecutive batches. Ignored unless ``num is None``.
+
+            collect_before (bool):
+                If True, runs a full garbage collection before timing, so
+                collections of objects created before timing do not happen
+                while timing. Defaults to True.
+
+            num_inner (int | str):
+                Number of times :func:`call` calls the function in each
+                timed loop. The measured time of a loop is divided by this,
+                which spreads the overhead of reading the clock over many
+                calls of a very fast function. If 'auto', the smallest
+                number in the sequence 1, 2, 5, 10, 20, 50, ... that takes at
+                least 0.2 ms is used, like :func:`timeit.Timer.autorange`.
+                Not used when iterating. Defaults to 1.
         """
         if verbose is None:
             verbose = bool(label)
+        if num_inner != 'auto' and (
+                not isinstance(num_inner, int) or isinstance(num_inner, bool)
+                or num_inner < 1):
+            raise ValueError(
+                'num_inner must be a positive int or "auto", '
+                'got {!r}'.format(num_inner))
 
         self.num = num
         self.label = label
@@ -327,16 +382,24 @@ class Timerit:
         self.unit = unit
         self.verbose = verbose
         self.min_duration = min_duration
-
-        self.times = []
+        self.min_stable_batches = min_stable_batches
+        self.disable_gc = disable_gc
+        self.collect_before = collect_before
+        self.num_inner = num_inner
+        # The number of calls per loop of the last timing, with 'auto' resolved
+        self._num_inner = 1
+
+        # Measured times are stored in the raw units of the timer's counter
+        # (e.g. integer nanoseconds) and only converted to seconds on access
+        self._raw_times = []
         self.total_time = 0
-
-        # self._raw_times = []
-        # self._raw_total = None
         self.n_loops = None
+        self._stats_cache = None
+        # Measured lazily by :func:`min_adjusted`, does not change on reset
+        self._raw_clock_overhead = None
 
         # Keep track of measures, does not change on reset by default
-        self.measures = defaultdict(dict)
+        self.measures = _new_measures()
 
         # Internal variables
         self._timer_cls = self._default_timer_cls if timer_cls is None else timer_cls
@@ -344,10 +407,10 @@ class Timerit:
         self._precision = self._default_precision
         self._precision_type = self._default_precision_type
 
-        # Create a foreground and background timer
-        self._bg_timer = self._timer_cls(verbose=0)   # (ideally this is unused)
-        self._fg_timer = self._timer_cls(verbose=0)   # (used directly by user)
-        self._to_seconds = self._bg_timer._to_seconds
+        # Create the timer used directly by the user. When the user does not
+        # use it, its clock is read directly to time the whole loop body.
+        self._fg_timer = self._timer_cls(verbose=0)
+        self._to_seconds = self._fg_timer._to_seconds
         # give the foreground timer a reference to this object, so the user can
         # access this object while still constructing the Timerit object inline
         # with the for loop.
@@ -379,47 +442,160 @@ class Timerit:
         if label:
             self.label = label
         if measures:
-            self.measures = defaultdict(dict)
-        self.times = []
+            self.measures = _new_measures()
+        self._raw_times = []
         self.n_loops = None
         self.total_time = None
+        self._stats_cache = None
         return self
 
-    # @property
-    # def total_time(self):
-    #     if self._raw_total is None:
-    #         return None
-    #     return self._raw_total / self._to_seconds
+    @property
+    def times(self):
+        """
+        Returns:
+            List[float]: The time in seconds measured for each loop.
+        """
+        to_seconds = self._to_seconds
+        return [t * to_seconds for t in self._raw_times]
 
-    # @property
-    # def times(self):
-    #     if self._raw_times is None:
-    #         return None
-    #     return [t * self._to_seconds for t in self._raw_times]
+    @times.setter
+    def times(self, times):
+        to_seconds = self._to_seconds
+        self._raw_times = [t / to_seconds for t in times]
+        self._stats_cache = None
 
     def call(self, func, *args, **kwargs):
         """
         Alternative way to time a simple function call using condensed syntax.
 
+        The clock is read directly around each call in a plain loop rather
+        than through the generator used by iteration, which adds the least
+        overhead of the ways to time with Timerit. When ``num`` is None, the
+        loop runs until ``min_duration`` has elapsed. Stopping once the times
+        are stable is handled by iterating over this object, which this falls
+        back to if ``min_stable_batches`` is given.
+
+        Args:
+            func (Callable): the function to time
+            *args: positional arguments passed to func
+            **kwargs: keyword arguments passed to func
+
         Returns:
             'Timerit': self :
                 Use `min`, or `mean` to get a scalar. Use `print` to output a
                 report to stdout.
 
-        Returns:
-            Timerit: self
-
         Example:
             >>> import math
             >>> from timerit import Timerit
             >>> time = Timerit(num=10).call(math.factorial, 50).min()
             >>> assert time > 0
+            >>> ti = Timerit(num=10, verbose=0).call(math.factorial, 50)
+            >>> assert ti.n_loops == 10
+            >>> ti = Timerit(num=None, min_duration=0.01, verbose=0)
+            >>> ti = ti.call(math.factorial, 50)
+            >>> assert ti.total_time > 0.01
+            >>> # Very fast functions can be called several times per loop
+            >>> ti = Timerit(num=10, num_inner='auto', verbose=0)
+            >>> ti = ti.call(math.factorial, 5)
+            >>> assert ti.n_loops == 10
         """
-        for timer in self:
-            with timer:
-                func(*args, **kwargs)
+        # Read the clock of the foreground timer directly rather than using it
+        # as a context manager, which would add enter / exit calls and
+        # verbosity checks to every timed call. This is only possible when the
+        # timer class does not customize how it starts and stops.
+        clock = self._fg_timer._time
+        direct = _reads_clock_directly(type(self._fg_timer))
+
+        num_inner = self.num_inner
+        if num_inner == 'auto':
+            # Calibrate under the same gc settings as the timed loop
+            with self._gc_state():
+                num_inner = self._autorange(func, args, kwargs)
+        self._num_inner = num_inner
+        if num_inner > 1:
+            # Time several calls per loop and divide the measured times after
+            inner_iter = range(num_inner)
+            inner_func = func
+
+            def func(*args, **kwargs):
+                for _ in inner_iter:
+                    inner_func(*args, **kwargs)
+
+        if not direct or (self.num is None and self.min_stable_batches):
+            for timer in self._iter(num_inner):
+                with timer:
+                    func(*args, **kwargs)
+            return self
+
+        if self.verbose >= 3:
+            print(self._status_line())
+
+        raw_times = []
+        raw_times_append = raw_times.append
+        with self._gc_state():
+            if self.num is None:
+                raw_min_duration = self.min_duration / self._to_seconds
+                raw_total = 0
+                while raw_total <= raw_min_duration:
+                    tstart = clock()
+                    func(*args, **kwargs)
+                    raw_time = clock() - tstart
+                    raw_times_append(raw_time)
+                    raw_total += raw_time
+            elif kwargs:
+                for _ in range(self.num):
+                    tstart = clock()
+                    func(*args, **kwargs)
+                    raw_times_append(clock() - tstart)
+            else:
+                # Avoid unpacking an empty kwargs dict inside the timed block
+                for _ in range(self.num):
+                    tstart = clock()
+                    func(*args)
+                    raw_times_append(clock() - tstart)
+
+        self.total_time = sum(raw_times) * self._to_seconds
+        if num_inner > 1:
+            raw_times = [t / num_inner for t in raw_times]
+        self._raw_times.extend(raw_times)
+        self.n_loops = len(raw_times)
+        self._finalize()
         return self
 
+    def _gc_state(self):
+        """
+        Returns:
+            _SetGCState: manages the garbage collector while timing
+        """
+        disable_gc = self.disable_gc
+        if disable_gc == 'freeze' and hasattr(gc, 'freeze'):
+            return _SetGCState(enable=None, collect=self.collect_before,
+                               freeze=True)
+        return _SetGCState(enable=False if disable_gc else None,
+                           collect=self.collect_before)
+
+    def _autorange(self, func, args, kwargs, min_time=2e-4):
+        """
+        Finds how many calls of a function take at least ``min_time`` seconds
+        in the same way as :func:`timeit.Timer.autorange`.
+
+        Returns:
+            int: the number of calls
+        """
+        clock = self._fg_timer._time
+        raw_min_time = min_time / self._to_seconds
+        scale = 1
+        while True:
+            for factor in (1, 2, 5):
+                number = scale * factor
+                tstart = clock()
+                for _ in range(number):
+                    func(*args, **kwargs)
+                if clock() - tstart >= raw_min_time:
+                    return number
+            scale *= 10
+
     def __iter__(self):
         """
         Yields:
@@ -427,46 +603,110 @@ class Timerit:
                 a timer context manager which can optionally be used to
                 localize the timed part of each iteration.
         """
+        return self._iter()
+
+    def _iter(self, num_inner=1):
+        """
+        The generator behind :func:`__iter__`.
+
+        Args:
+            num_inner (int):
+                The number of calls each iteration times. The recorded times
+                are divided by this, but ``min_duration`` and ``total_time``
+                use the real elapsed time.
+
+        Yields:
+            Timer
+        """
+        self._num_inner = num_inner
         if self.verbose >= 3:
             print(self._status_line())
 
         self.n_loops = 0
         self.total_time = 0
 
-        bg_timer = self._bg_timer
+        # Cache lookups used in the core loop as locals. The loop count and
+        # total are also kept as locals and copied to the attributes after
+        # each block.
+        num = self.num
+        n_loops = 0
+        bg_time = self._fg_timer._time
         fg_timer = self._fg_timer
+        to_seconds = self._to_seconds
+        raw_times_append = self._raw_times.append
+
+        # Accumulate the total in raw counter units
+        raw_total = 0
+        raw_min_duration = self.min_duration / to_seconds
+
+        # State for stopping early once the best time stabilizes
+        bestof = self.bestof
+        check_stable = num is None and bool(self.min_stable_batches)
+        num_stable = 0
+        best_raw = None
 
         # disable the garbage collector while timing
-        with _SetGCState(enable=False), _SetDisplayHook():
+        gc_state = self._gc_state()
+        # A fixed number of loops uses a plain range, otherwise the loop runs
+        # until one of the stopping conditions below is met
+        loop_iter = it.count() if num is None else range(num)
+        with gc_state, _SetDisplayHook():
             # Core timing loop
-            while True:
+            for _ in loop_iter:
 
-                if self.num is None:
-                    if self.total_time > self.min_duration:
+                if num is None:
+                    if raw_total > raw_min_duration:
                         break
-                else:
-                    if self.n_loops >= self.num:
+                    if check_stable and num_stable >= self.min_stable_batches:
                         break
 
-                # Start background timer (in case the user doesn't use
-                # fg_timer)
+                # Start background timing (in case the user doesn't use
+                # fg_timer). The clock is read directly to avoid the overhead
+                # of the Timer methods and of a second Timer object.
                 # Yield foreground timer to let the user run a block of code
                 # When we return from yield the user code will have just finished
                 # Then record background time + loop overhead
-                bg_timer.tic()
+                # Clear the previous block's time so a block that does not use
+                # fg_timer falls back on the background time
+                fg_timer._raw_elapsed = -1
+                bg_tstart = bg_time()
                 yield fg_timer
-                bg_time = bg_timer.toc()
-                # Check if the fg_timer object was used, but fallback on bg_timer
-                if fg_timer.elapsed >= 0:
-                    block_time = fg_timer.elapsed  # higher precision?
-                else:
-                    block_time = bg_time  # lower precision?
+                bg_tstop = bg_time()
+                # Check if the fg_timer object was used, but fallback on the
+                # background time
+                block_raw_time = fg_timer._raw_elapsed  # higher precision?
+                if block_raw_time < 0:
+                    block_raw_time = bg_tstop - bg_tstart  # lower precision?
                 # record timings
-                self.times.append(block_time)
-                self.total_time += block_time
-                self.n_loops += 1
+                if num_inner > 1:
+                    raw_times_append(block_raw_time / num_inner)
+                else:
+                    raw_times_append(block_raw_time)
+                raw_total += block_raw_time
+                n_loops += 1
+                # Keep the progress visible to the timed block and to
+                # callers that stop iterating early
+                self.n_loops = n_loops
+                self.total_time = raw_total * to_seconds
+
+                if check_stable and n_loops % bestof == 0:
+                    # Count consecutive batches where the best time did not
+                    # improve by more than 1%
+                    batch_best = min(self._raw_times[-bestof:])
+                    if best_raw is None or batch_best < best_raw * 0.99:
+                        num_stable = 0
+                    else:
+                        num_stable += 1
+                    if best_raw is None or batch_best < best_raw:
+                        best_raw = batch_best
+        self._finalize()
+
+    def _finalize(self):
+        """
+        Records and reports the measurement after a timing loop finishes.
+        """
         # Timing complete, print results
-        if self.num and len(self.times) != self.num:
+        if self.num and len(self._raw_times) != self.num:
             raise AssertionError(
                 'incorrectly recorded times, need to reset timerit object')
 
@@ -480,10 +720,11 @@ class Timerit:
         Saves the current time measurements for the current labels.
         """
         measures = self.measures
-        measures['mean'][self.label] = self.mean()
-        measures['min'][self.label] = self.min()
-        measures['mean-std'][self.label] = self.mean() - self.std()
-        measures['mean+std'][self.label] = self.mean() + self.std()
+        min_, mean, std = self._stats()
+        measures['mean'][self.label] = mean
+        measures['min'][self.label] = min_
+        measures['mean-std'][self.label] = mean - std
+        measures['mean+std'][self.label] = mean + std
         return measures
 
     def robust_times(self):
@@ -493,10 +734,37 @@ class Timerit:
         Returns:
             List[float]: The measured times reduced by bestof sampling.
         """
-        chunk_iter = _chunks(self.times, self.bestof)
-        times = list(map(min, chunk_iter))
+        to_seconds = self._to_seconds
+        times = [t * to_seconds for t in self._raw_robust_times()]
         return times
 
+    def _raw_robust_times(self):
+        """
+        Like :func:`robust_times`, but in the raw units of the timer's counter.
+        The result is cached alongside the statistics in :func:`_stats`.
+
+        Returns:
+            Tuple[int | float, ...]: The minimum raw time of each chunk of
+                trials.
+        """
+        raw_times = self._raw_times
+        bestof = self.bestof
+        key = (len(raw_times), bestof)
+        cache = self._stats_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+        if bestof == 1:
+            chunk_mins = tuple(raw_times)
+        else:
+            # Zipping copies of the same iterator groups the times into chunks
+            # of bestof without slicing. The final chunk may be shorter.
+            chunk_mins = tuple(map(min, zip(*[iter(raw_times)] * bestof)))
+            num_full = len(chunk_mins) * bestof
+            if num_full < len(raw_times):
+                chunk_mins += (min(raw_times[num_full:]),)
+        self._stats_cache = (key, chunk_mins, None)
+        return chunk_mins
+
     @property
     def rankings(self):
         """
@@ -563,32 +831,46 @@ class Timerit:
         """
         rankings = {
             k: OrderedDict(sorted(d.items(), key=lambda kv: kv[1]))
-            for k, d in self.measures.items()
+            for k, d in self.measures.items() if d
         }
         return rankings
 
     @property
     def consistency(self):
-        """"
+        """
         Take the hamming distance between the preference profiles to as a
         measure of consistency.
 
         Returns:
             float: Hamming distance
+
+        Example:
+            >>> from timerit import Timerit
+            >>> ti = Timerit()
+            >>> ti.measures['mean'].update({'a': 1, 'b': 2, 'c': 3})
+            >>> ti.measures['min'].update({'a': 1, 'b': 3, 'c': 2})
+            >>> print(round(ti.consistency, 4))
+            0.3333
         """
         rankings = self.rankings
 
         if len(rankings) == 0:
             raise Exception('no measurements')
 
-        hamming_sum = sum(
-            k1 != k2
-            for v1, v2 in it.combinations(rankings.values(), 2)
-            for k1, k2 in zip(v1.keys(), v2.keys())
+        orders = [tuple(ranking.keys()) for ranking in rankings.values()]
+        num_labels = len(orders[0])
+        num_metrics = len(orders)
+        num_pairs = num_metrics * (num_metrics - 1) // 2
+        # Two metrics agree at a position when they rank the same label there.
+        # Counting the agreeing pairs at each position avoids comparing every
+        # pair of metrics.
+        num_agree = sum(
+            count * (count - 1) // 2
+            for column in zip(*orders)
+            for count in Counter(column).values()
         )
-        num_labels = len(list(rankings.values())[0])
-        num_metrics = len(rankings)
-        num_bits = (num_metrics * (num_metrics - 1) // 2) * num_labels
+        hamming_sum = num_pairs * num_labels - num_agree
+        num_bits = num_pairs * num_labels
         hamming_ave = hamming_sum / num_bits
         score = 1.0 - hamming_ave
         return score
@@ -620,7 +902,54 @@ class Timerit:
             >>> self.call(math.factorial, 50)
             >>> assert self.min() > 0
         """
-        return min(self.times)
+        return self._stats()[0]
+
+    def min_adjusted(self):
+        """
+        The best time overall minus the overhead of reading the clock.
+
+        Every measurement includes the cost of the pair of clock reads around
+        the timed code. This is negligible for most code, but can be a large
+        fraction of the time of sub-microsecond snippets. The overhead is
+        calibrated once per object as the fastest of many back-to-back clock
+        reads, and the result is clamped at zero. When ``num_inner`` calls
+        share one pair of clock reads, only their share of it is subtracted.
+
+        Returns:
+            float: Minimum measured seconds with the clock overhead removed
+
+        Example:
+            >>> from timerit import Timerit
+            >>> self = Timerit(num=100, verbose=0).call(sum, range(100))
+            >>> assert 0 <= self.min_adjusted() <= self.min()
+        """
+        overhead = self._clock_overhead() * self._to_seconds / self._num_inner
+        return max(self.min() - overhead, 0)
+
+    def _clock_overhead(self, num=1000):
+        """
+        Measures the cost of a start / stop pair of clock reads.
+
+        The minimum rather than the mean is used, because it is the floor
+        that every measurement pays.
+
+        Args:
+            num (int): number of calibration samples
+
+        Returns:
+            int | float: the overhead in the raw units of the timer's counter
+        """
+        if self._raw_clock_overhead is None:
+            clock = self._fg_timer._time
+            best = None
+            with _SetGCState(enable=False):
+                for _ in range(num):
+                    tstart = clock()
+                    raw_elapsed = clock() - tstart
+                    if best is None or raw_elapsed < best:
+                        best = raw_elapsed
+            self._raw_clock_overhead = max(best, 0)
+        return self._raw_clock_overhead
 
     def mean(self):
         """
@@ -641,9 +970,7 @@ class Timerit:
             >>> self.call(math.factorial, 50)
             >>> assert self.mean() > 0
         """
-        times = self.robust_times()
-        mean = sum(times) / len(times)
-        return mean
+        return self._stats()[1]
 
     def std(self):
         """
@@ -663,11 +990,49 @@ class Timerit:
             >>> self.call(math.factorial, 50)
             >>> assert self.std() >= 0
         """
-        import math
-        times = self.robust_times()
-        mean = sum(times) / len(times)
-        std = math.sqrt(sum((t - mean) ** 2 for t in times) / len(times))
-        return std
+        return self._stats()[2]
+
+    def _stats(self):
+        """
+        Computes the min, mean, and std from a single pass of bestof
+        sampling. The result is cached until more times are recorded or the
+        object is reset.
+
+        Returns:
+            Tuple[float, float, float]: min, mean, and std in seconds
+
+        Example:
+            >>> from timerit import Timerit
+            >>> self = Timerit(num=10, verbose=0).call(sum, range(100))
+            >>> min_, mean, std = self._stats()
+            >>> assert min_ <= mean
+            >>> assert self._stats() is self._stats()
+        """
+        # Work in raw counter units, where the times are exact integers for
+        # nanosecond counters, and only convert the final statistics.
+        raw_times = self._raw_robust_times()
+        key, _, stats = self._stats_cache
+        if stats is not None:
+            return stats
+        num = len(raw_times)
+        # The min of the chunk minimums is the overall min
+        raw_min = min(raw_times)
+        raw_sum = sum(raw_times)
+        raw_mean = raw_sum / num
+        if isinstance(raw_min, int):
+            # Integer nanoseconds allow the variance to be computed exactly
+            # from the sum of squares, which map evaluates without a Python
+            # level loop.
+            raw_sqsum = sum(map(operator.mul, raw_times, raw_times))
+            raw_var = (num * raw_sqsum - raw_sum * raw_sum) / (num * num)
+        else:
+            raw_var = sum((t - raw_mean) ** 2 for t in raw_times) / num
+        raw_std = math.sqrt(raw_var)
+        to_seconds = self._to_seconds
+        stats = (raw_min * to_seconds, raw_mean * to_seconds,
+                 raw_std * to_seconds)
+        self._stats_cache = (key, raw_times, stats)
+        return stats
 
     def _seconds_str(self):
         """
@@ -681,24 +1046,21 @@ class Timerit:
             >>> print(self._seconds_str())  # xdoctest: +IGNORE_WANT
             'best=3.423 µs, ave=3.451 ± 0.027 µs'
         """
-        mean = self.mean()
+        min_, mean, std = self._stats()
         unit, mag = _choose_unit(mean, self.unit, self._asciimode)
 
-        unit_min = self.min() / mag
+        unit_min = min_ / mag
         unit_mean = mean / mag
 
         # Is showing the std useful? It probably doesn't hurt.
-        std = self.std()
         unit_std = std / mag
         pm = _trychar('±', '+-', self._asciimode)
-        fmtstr = ('best={min:.{pr1}{t}} {unit}, '
-                  'mean={mean:.{pr1}{t}} {pm} {std:.{pr2}{t}} {unit}')
         pr1 = pr2 = self._precision
         if isinstance(self._precision, int):  # pragma: nobranch
             pr2 = max(self._precision - 2, 1)
-        unit_str = fmtstr.format(min=unit_min, unit=unit, mean=unit_mean,
-                                 t=self._precision_type, pm=pm, std=unit_std,
-                                 pr1=pr1, pr2=pr2)
+        t = self._precision_type
+        unit_str = (f'best={unit_min:.{pr1}{t}} {unit}, '
+                    f'mean={unit_mean:.{pr1}{t}} {pm} {unit_std:.{pr2}{t}} {unit}')
         return unit_str
 
     def _status_line(self):
@@ -769,7 +1131,6 @@ class Timerit:
             pow is 36.45% faster than mul
 
         """
-        from timerit.relative import Relative
         lines = []
         # TODO: hook up comparisons in an intuitive manner
         method_to_value = self.rankings['mean']
@@ -856,14 +1217,57 @@ class Timerit:
         print(self.report(verbose=verbose))
 
 
+def _new_measures():
+    """
+    Creates the container for the statistics that
+    :func:`Timerit._record_measurement` saves for each label.
+    """
+    return {'mean': {}, 'min': {}, 'mean-std': {}, 'mean+std': {}}
+
+
+def _reads_clock_directly(timer_cls):
+    """
+    Checks if timing with a timer class only reads its clock, which allows
+    :func:`Timerit.call` to read the clock itself.
+
+    Args:
+        timer_cls (type): a subclass of :class:`Timer`
+
+    Returns:
+        bool: False if the class customizes tic, toc, their raw helpers, or
+        the context manager
+
+    Example:
+        >>> from timerit.core import Timer, _reads_clock_directly
+        >>> class SyncTimer(Timer):
+        ...     def toc(self):
+        ...         return super().toc()
+        >>> assert _reads_clock_directly(Timer)
+        >>> assert not _reads_clock_directly(SyncTimer)
+    """
+    return all(getattr(timer_cls, name, None) is getattr(Timer, name)
+               for name in ('tic', 'toc', '_raw_tic', '_raw_toc',
+                            '__enter__', '__exit__'))
+
+
 class _SetGCState(object):
     """
     Context manager to disable garbage collection.
 
-    Set the state and then returns to previous state after context exists.
+    Set the state and then returns to previous state after context exists,
+    even if an exception was raised.
 
     Args:
-        enable (bool): Set the gc to this state.
+        enable (bool | None): Set the gc to this state. If None the state is
+            left unchanged.
+        collect (bool): If True, run a full collection on entry before the
+            state is set. Defaults to False.
+        freeze (bool): If True, move all existing objects to the permanent
+            generation on entry with :func:`gc.freeze` and release them on
+            exit. :func:`gc.unfreeze` releases every frozen object, so if the
+            caller already froze objects (e.g. before forking), nothing is
+            released on exit and the objects frozen on entry stay frozen.
+            Requires Python 3.7+. Defaults to False.
 
     Example:
         >>> import gc
@@ -873,26 +1277,42 @@ class _SetGCState(object):
         >>>     with _SetGCState(True):
         >>>         assert gc.isenabled()
         >>>     assert not gc.isenabled()
+        >>>     with _SetGCState(None):
+        >>>         assert not gc.isenabled()
         >>> assert gc.isenabled() == prev
+
+    Example:
+        >>> import gc
+        >>> if hasattr(gc, 'freeze'):
+        >>>     with _SetGCState(None, freeze=True):
+        >>>         assert gc.get_freeze_count() > 0
+        >>>     assert gc.get_freeze_count() == 0
     """
-    def __init__(self, enable):
+    __slots__ = ('enable', 'collect', 'freeze', 'prev', 'unfreeze')
+
+    def __init__(self, enable, collect=False, freeze=False):
         self.enable = enable
+        self.collect = collect
+        self.freeze = freeze
         self.prev = None
+        self.unfreeze = False
 
     def __enter__(self):
-        import gc
+        if self.collect:
+            gc.collect()
+        if self.freeze:
+            # Unfreezing on exit would also release objects the caller froze,
+            # so only unfreeze if nothing was frozen before
+            self.unfreeze = gc.get_freeze_count() == 0
+            gc.freeze()
         self.prev = gc.isenabled()
-        if self.enable:
-            gc.enable()
-        else:
-            gc.disable()
+        if self.enable is not None:
+            (gc.enable if self.enable else gc.disable)()
 
     def __exit__(self, ex_type, ex_value, trace):
-        import gc
-        if self.prev:
-            gc.enable()
-        else:
-            gc.disable()
+        (gc.enable if self.prev else gc.disable)()
+        if self.unfreeze:
+            gc.unfreeze()
 
 
 class _SetDisplayHook(object):
@@ -903,6 +1323,8 @@ class _SetDisplayHook(object):
     Printing is relatively expensive, and so this behavior can easily lead to
     timings that are much longer than they should be.
     """
+    __slots__ = ('_orig_display_hook',)
+
     def __enter__(self):
         self._orig_display_hook = sys.displayhook
         sys.displayhook = lambda x: None
@@ -911,9 +1333,14 @@ class _SetDisplayHook(object):
         sys.displayhook = self._orig_display_hook
 
 
-def _chunks(seq, size):
-    """ simple (lighter?) two-line alternative to :func:`ubelt.chunks` """
-    return (seq[pos:pos + size] for pos in range(0, len(seq), size))
+# Maps each unit to its display suffix and size in seconds. The microsecond
+# suffix falls back to ascii when stdout cannot encode it.
+_UNITS = {
+    's': ('s', 1e0),
+    'ms': ('ms', 1e-3),
+    'us': ('µs', 1e-6),
+    'ns': ('ns', 1e-9),
+}
 
 
 def _choose_unit(value, unit=None, asciimode=None):
@@ -935,20 +1362,18 @@ def _choose_unit(value, unit=None, asciimode=None):
         >>> assert _choose_unit(1e-2, unit=None)[0] == 'ms'
         >>> assert _choose_unit(1e-4, unit=None, asciimode=True)[0] == 'us'
         >>> assert _choose_unit(1.1, unit='ns')[0] == 'ns'
+        >>> assert _choose_unit(1e-12, unit=None)[0] == 'ns'
     """
-    micro = _trychar('µs', 'us', asciimode)
-    units = OrderedDict([
-        ('s', ('s', 1e0)),
-        ('ms', ('ms', 1e-3)),
-        ('us', (micro, 1e-6)),
-        ('ns', ('ns', 1e-9)),
-    ])
     if unit is None:
-        for suffix, mag in units.values():  # pragma: nobranch
-            if value > mag:
-                break
-    else:
-        suffix, mag = units[unit]
+        # Compare against the fixed thresholds directly rather than looping
+        # over the table
+        unit = ('s' if value > 1e0 else
+                'ms' if value > 1e-3 else
+                'us' if value > 1e-6 else 'ns')
+    suffix, mag = _UNITS[unit]
+    if unit == 'us':
+        # Only the microsecond suffix depends on the stdout encoding
+        suffix = _trychar(suffix, 'us', asciimode)
     return suffix, mag
 
 
@@ -966,16 +1391,41 @@ def _trychar(char, fallback, asciimode=None):  # nocover
         >>> char = _trychar('µs', 'us')
         >>> print('char = {}'.format(char))
         >>> assert _trychar('µs', 'us', asciimode=True) == 'us'
+        >>> # The result follows the encoding of the current stdout
+        >>> import io
+        >>> from contextlib import redirect_stdout
+        >>> ascii_stdout = io.TextIOWrapper(io.BytesIO(), encoding='ascii')
+        >>> with redirect_stdout(ascii_stdout):
+        >>>     char = _trychar('µs', 'us')
+        >>> assert char == 'us'
 
     """
     if asciimode is True:
         # If we request ascii mode simply return it
         return fallback
-    if hasattr(sys.stdout, 'encoding') and sys.stdout.encoding:  # pragma: nobranch
-        try:
-            char.encode(sys.stdout.encoding)
-        except Exception:  # nocover
-            pass
-        else:
-            return char
+    encoding = getattr(sys.stdout, 'encoding', None)
+    if encoding and _can_encode(char, encoding):  # pragma: nobranch
+        return char
     return fallback  # nocover
+
+
+@lru_cache(maxsize=32)
+def _can_encode(char, encoding):
+    """
+    Cached check if a character can be encoded. The stdout encoding is part of
+    the key, so redirecting stdout does not return stale results.
+
+    Example:
+        >>> from timerit.core import _can_encode
+        >>> _can_encode.cache_clear()
+        >>> assert _can_encode('µs', 'utf-8')
+        >>> assert not _can_encode('µs', 'ascii')
+        >>> assert _can_encode('µs', 'utf-8')
+        >>> info = _can_encode.cache_info()
+        >>> assert (info.hits, info.misses) == (1, 2)
+    """
+    try:
+        char.encode(encoding)
+    except Exception:  # nocover
+        return False
+    return True
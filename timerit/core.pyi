@@ -10,8 +10,8 @@ class Timer:
     label: str
     verbose: int | None
     newline: bool
-    write: Incomplete
-    flush: Incomplete
+    write: Incomplete | None
+    flush: Incomplete | None
 
     def __init__(self,
                  label: str = '',
@@ -49,7 +49,10 @@ class Timerit:
     unit: str | None
     verbose: int | None
     min_duration: float
-    times: Incomplete
+    min_stable_batches: int | None
+    disable_gc: bool | str
+    collect_before: bool
+    num_inner: int | str
     total_time: int
     n_loops: Incomplete
 
@@ -59,9 +62,12 @@ class Timerit:
                  bestof: int = 3,
                  unit: str | None = None,
                  verbose: int | None = None,
-                 disable_gc: bool = True,
+                 disable_gc: bool | str = True,
                  timer_cls: None | Any = None,
-                 min_duration: float = 0.2) -> None:
+                 min_duration: float = 0.2,
+                 min_stable_batches: int | None = None,
+                 collect_before: bool = True,
+                 num_inner: int | str = 1) -> None:
         ...
 
     def reset(self,
@@ -69,6 +75,14 @@ class Timerit:
               measures: bool = False) -> Timerit:
         ...
 
+    @property
+    def times(self) -> List[float]:
+        ...
+
+    @times.setter
+    def times(self, times: List[float]) -> None:
+        ...
+
     def call(self, func, *args, **kwargs) -> Timerit:
         ...
 
@@ -89,6 +103,9 @@ class Timerit:
     def min(self) -> float:
         ...
 
+    def min_adjusted(self) -> float:
+        ...
+
     def mean(self) -> float:
         ...
 
@@ -106,10 +123,16 @@ class Timerit:
 
 
 class _SetGCState:
-    enable: Incomplete
+    enable: bool | None
+    collect: bool
+    freeze: bool
     prev: Incomplete
+    unfreeze: bool
 
-    def __init__(self, enable) -> None:
+    def __init__(self,
+                 enable: bool | None,
+                 collect: bool = False,
+                 freeze: bool = False) -> None:
         ...
 
     def __enter__(self) -> None: